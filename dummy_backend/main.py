@@ -1,7 +1,7 @@
 # dummy backend
 from fastapi import FastAPI # used for creating the FastAPI application
 from fastapi.middleware.cors import CORSMiddleware # used for handling CORS
-from fastapi.responses import JSONResponse # used for creating JSON responses
+from fastapi.responses import ORJSONResponse # orjson-backed JSON responses
 from fastapi import APIRouter #used for creating API routes
 from fastapi import Request, Response # used for handling requests and responses
 from fastapi import HTTPException # used for raising HTTP exceptions
@@ -15,8 +15,8 @@ app = FastAPI(
     contact={
         "name": "Navdeep Singh",
         "email": "navdeep.s@clear.com"
-    }
-    
+    },
+    default_response_class=ORJSONResponse,
 )
 
 # CORS middleware to allow all origins
@@ -44,4 +44,4 @@ async def health_check(request: Request):
     Health check endpoint to verify the service is running.
     """
     logger.info("Health check endpoint called")
-    return JSONResponse(content={"status": "ok"}, status_code=200)
\ No newline at end of file
+    return {"status": "ok"}
\ No newline at end of file
@@ -1,59 +1,159 @@
-from fastapi import HTTPException, Request, Response
-from fastapi.responses import JSONResponse
-import httpx
-import asyncio # library to write concurrent code using the async/await syntax.
-import logging
-
-from config import PRIMARY_BACKEND, REDIS_URL, MAX_CONCURRENT_REQUESTS
-
-logging.basicConfig(level = logging.INFO, format= '%(asctime)s - %(levelname)s - %(filename)s:%(lineno)d - %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
-logger = logging.getLogger(__name__)
-
-semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
-
-# using for outgoing requests to primary backend 
-client = httpx.AsyncClient(base_url=PRIMARY_BACKEND, follow_redirects=False,timeout=5.0)
-
-async def forward_proxy(request: Request) -> Response:
-    """
-    Forward the request to the primary backend and return the response.
-    """
-    async with semaphore:
-        try:
-            url_path = request.url.path
-            method = request.method
-            headers = dict(request.headers) # as request.headers is immutable, we convert it to a mutable dict
-            headers.pop("host", None) 
-            data = await request.body()
-            logger.info(f"Forwarding request to {url_path} with method {method}")
-            
-            if request.url.query:
-                url_path += f"?{request.url.query}"
-            headers["X-Forwarded-For"] = request.client.host if request.client else "unknown"
-            headers["X-Forwarded-Proto"] = request.url.scheme if request.url else "http"
-            
-            logger.info(f"Proxying {request.method} {url_path} from {request.client.host} to {PRIMARY_BACKEND}")
-            
-            backend_response = await client.request(
-                method=method,
-                url=url_path,
-                headers=headers,
-                content=data
-            )
-            
-            return Response(
-                content=backend_response.content,
-                status_code=backend_response.status_code,
-                headers=backend_response.headers,
-                media_type=backend_response.headers.get("Content-Type", "application/json")
-            )
-            
-        except httpx.RequestError as e:
-            logger.error(f"HTTPX Request Error forwarding to backend: {e}")
-            raise HTTPException(status_code=503, detail="Backend service unavailable")
-        except httpx.TimeoutException as e:
-            logger.error(f"HTTPX Timeout Error forwarding to backend: {e}")
-            raise HTTPException(status_code=504, detail="Gateway timeout")
-        except Exception as e:
-            logger.exception(f"Unexpected error forwarding to backend: {e}")
-            raise HTTPException(status_code=500, detail="Internal Gateway error")
\ No newline at end of file
+from fastapi import HTTPException, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.background import BackgroundTask
+import httpx
+import asyncio # library to write concurrent code using the async/await syntax.
+import logging
+
+from config import PRIMARY_BACKEND, REDIS_URL, MAX_CONCURRENT_REQUESTS
+
+logging.basicConfig(level = logging.WARNING, format= '%(asctime)s - %(levelname)s - %(filename)s:%(lineno)d - %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
+logger = logging.getLogger(__name__)
+
+class FairSemaphore:
+    """
+    FIFO-fair concurrency gate. asyncio.Semaphore wakes a waiter that can have
+    its permit stolen by a task that arrives between the wakeup and the
+    re-acquire, which starves long waiters under overload. Handing out permits
+    through an asyncio.Queue makes admission strictly arrival-ordered, so the
+    wait behind the gate is bounded and P99 stays predictable.
+    """
+
+    def __init__(self, permits: int):
+        self._permits: asyncio.Queue = asyncio.Queue()
+        for _ in range(permits):
+            self._permits.put_nowait(None)
+
+    async def acquire(self):
+        await self._permits.get()
+
+    def release(self):
+        self._permits.put_nowait(None)
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.release()
+
+
+semaphore = FairSemaphore(MAX_CONCURRENT_REQUESTS)
+
+# cheap, bounded calls that skip the concurrency gate: liveness probes and
+# CORS preflights must not be dropped just because real traffic saturated the
+# backend, or monitors mark the service down and cause cascading failures
+SKIP_QUEUE_METHODS = frozenset({"HEAD", "OPTIONS"})
+
+# headers that must not be forwarded: host is rewritten by httpx, the rest are
+# hop-by-hop per RFC 9110 and only meaningful on a single connection
+HOP_BY_HOP_HEADERS = frozenset(
+    b"host connection keep-alive te trailers transfer-encoding upgrade "
+    b"proxy-authenticate proxy-authorization proxy-connection".split()
+)
+
+def build_backend_client() -> httpx.AsyncClient:
+    """
+    Builds the shared client for outgoing requests to the primary backend.
+    HTTP/2 multiplexes concurrent requests over one connection, and the large
+    keepalive pool avoids per-request TCP/TLS handshakes under load.
+    """
+    return httpx.AsyncClient(
+        base_url=PRIMARY_BACKEND,
+        follow_redirects=False,
+        http2=True,
+        limits=httpx.Limits(
+            max_connections=512,
+            max_keepalive_connections=256,
+            keepalive_expiry=30,
+        ),
+        timeout=httpx.Timeout(5.0, connect=1.0),
+    )
+
+async def forward_proxy(request: Request, client_ip: str = "unknown") -> Response:
+    """
+    Forward the request to the primary backend and return the response.
+    The caller passes the client IP it already extracted so it is not
+    re-derived here. Health checks and preflights bypass the concurrency
+    gate entirely.
+    """
+    scope = request.scope
+    if scope["method"] in SKIP_QUEUE_METHODS or scope["path"].endswith("/health"):
+        return await proxy_request(request, client_ip)
+    # the permit must outlive this function: the streamed response body is
+    # relayed after we return, so releasing on exit would gate only the header
+    # phase and let up to max_connections bodies hit the backend at once.
+    # proxy_request hands the release to the response's background task.
+    await semaphore.acquire()
+    try:
+        return await proxy_request(request, client_ip, release=semaphore.release)
+    except BaseException:
+        semaphore.release()
+        raise
+
+
+async def proxy_request(request: Request, client_ip: str, release=None) -> Response:
+    """
+    Does the actual forwarding to the backend, without concurrency control.
+    If `release` is given it is called once the backend response is closed,
+    i.e. after the body has finished streaming to the client.
+    """
+    client = request.app.state.client
+    try:
+        # read everything straight off the ASGI scope in one place: method,
+        # raw_path, query_string, scheme and headers are the values the server
+        # already parsed, so none of Starlette's request.url / request.headers
+        # descriptor machinery runs on the hot path
+        scope = request.scope
+        raw_path = scope.get("raw_path") or scope["path"].encode("latin-1")
+        query_string = scope["query_string"]
+        if query_string:
+            raw_path += b"?" + query_string
+        url_path = raw_path.decode("latin-1")
+        method = scope["method"]
+        # single pass over the raw byte tuples instead of building a dict and
+        # mutating it; skips hop-by-hop headers in the same sweep
+        headers = [
+            (k, v) for k, v in scope["headers"]
+            if k.lower() not in HOP_BY_HOP_HEADERS
+        ]
+        headers.append((b"x-forwarded-for", client_ip.encode("latin-1")))
+        headers.append((b"x-forwarded-proto", (scope.get("scheme") or "http").encode("latin-1")))
+
+        # per-request logging is DEBUG only, with lazy %-formatting so the
+        # message is never built when the level is suppressed
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Proxying %s %s from %s to %s", method, url_path, client_ip, PRIMARY_BACKEND)
+
+        # stream both directions: the request body is piped to the backend
+        # as it arrives and the backend response is piped to the client as
+        # it arrives, so large payloads are never buffered in memory
+        backend_request = client.build_request(
+            method=method,
+            url=url_path,
+            headers=headers,
+            content=request.stream()
+        )
+        backend_response = await client.send(backend_request, stream=True)
+
+        async def finalize():
+            await backend_response.aclose()
+            if release is not None:
+                release()
+
+        return StreamingResponse(
+            backend_response.aiter_raw(),
+            status_code=backend_response.status_code,
+            headers=backend_response.headers,
+            background=BackgroundTask(finalize)
+        )
+
+    except httpx.RequestError as e:
+        logger.error("HTTPX Request Error forwarding to backend: %s", e)
+        raise HTTPException(status_code=503, detail="Backend service unavailable")
+    except httpx.TimeoutException as e:
+        logger.error("HTTPX Timeout Error forwarding to backend: %s", e)
+        raise HTTPException(status_code=504, detail="Gateway timeout")
+    except Exception as e:
+        logger.exception("Unexpected error forwarding to backend: %s", e)
+        raise HTTPException(status_code=500, detail="Internal Gateway error")
\ No newline at end of file